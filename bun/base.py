@@ -33,26 +33,16 @@ class UIBase:
         Finally, 'be_quiet' also applies only to the CLI and, if True,
         indicates that informational messages should not be printed.
         '''
-        self._name        = name
-        self._subtitle    = subtitle
+        # Information about the interface, for use by callers.
+        self.app_name     = name
+        self.app_subtitle = subtitle
+        self.is_gui       = use_gui
+
         self._show_banner = show_banner
-        self._use_gui     = use_gui
         self._use_color   = use_color
         self._be_quiet    = be_quiet
 
 
-    def is_gui(self):
-        return self._use_gui
-
-
-    def app_name(self):
-        return self._name
-
-
-    def app_subtitle(self):
-        return self._subtitle
-
-
     # Methods for starting and stopping the interface -------------------------
 
     def start(self): raise NotImplementedError
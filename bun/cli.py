@@ -14,20 +14,19 @@ is open-source software released under a 3-clause BSD license.  Please see the
 file "LICENSE" for more information.
 '''
 
-from   commonpy.string_utils import antiformat
+from   functools import lru_cache
 import getpass
-from   queue import Queue
-from   rich import box
-from   rich.box import HEAVY, DOUBLE_EDGE, ASCII
-from   rich.console import Console
-from   rich.panel import Panel
-from   rich.style import Style
-from   rich.theme import Theme
 import shutil
 import sys
+import threading
 
 if __debug__:
     from sidetrack import log
+    # sidetrack 2.x moved format arguments from log(...) to logf(...).
+    try:
+        from sidetrack import logf
+    except ImportError:
+        from sidetrack import log as logf
 
 from .base import UIBase
 
@@ -44,12 +43,15 @@ from .base import UIBase
 # get noticeably different color shades and brightness if I use cmd.exe vs
 # Cmder, and those are different *again* from my iTerm2 defaults on macOS.
 # So here I'm trying to find some compromise that will work in most cases.
+#
+# Rich is imported lazily (it takes a noticeable time to load), so the
+# styles are kept as a plain dict and _CLI_THEME is created on first use.
 
 if sys.platform.startswith('win'):
     # Note: Microsoft's Terminal (and I guess some others on Windows) can't show
     # bold (2021-06-29). C.f. https://github.com/microsoft/terminal/issues/109
     # The following style still uses bold in case that changes in the future.
-    _CLI_THEME = Theme({
+    _CLI_STYLES = {
         'info'        : 'green3',
         'warn'        : 'orange1',
         'warning'     : 'orange1',
@@ -58,9 +60,9 @@ if sys.platform.startswith('win'):
         'fatal'       : 'bold red',
         'standout'    : 'bold dark_sea_green2',
         'banner'      : 'green3',
-    })
+    }
 else:
-    _CLI_THEME = Theme({
+    _CLI_STYLES = {
         'info'        : 'dark_sea_green4',
         'warn'        : 'orange1',
         'warning'     : 'orange1',
@@ -69,7 +71,12 @@ else:
         'fatal'       : 'bold red',
         'standout'    : 'bold chartreuse3',
         'banner'      : 'dark_sea_green4',
-    })
+    }
+
+_CLI_THEME = None
+
+# Rich consoles, shared by CLI instances having the same color setting.
+_CONSOLES = {}
 
 
 # Exported classes.
@@ -84,36 +91,34 @@ class CLI(UIBase):
         self._started = False
 
         # If another thread was eager to send messages before we finished
-        # initialization, messages will get queued up on this internal queue.
-        self._queue = Queue()
+        # initialization, messages will get queued up on this internal list.
+        # The lock guards the list and self._started while start() drains it.
+        self._queue = []
+        self._lock = threading.Lock()
 
         # Initialize output configuration.
-        self._console = Console(theme = _CLI_THEME,
-                                color_system = "auto" if use_color else None)
+        self._console = _console(use_color)
 
         if show_banner and not be_quiet:
-            # We need the plain_text version in any case, to calculate length.
-            subtitle_part = f': {subtitle}' if subtitle else ''
-            plain_text = f'Welcome to {name}{subtitle_part}'
-            fancy_text = f'Welcome to [standout]{name}[/]{subtitle_part}'
-            text = fancy_text if use_color else plain_text
             terminal_width = shutil.get_terminal_size().columns or 80
-            odd_adjustment = 0 if (terminal_width % 2 == 0) else 2
-            padding = (terminal_width - len(plain_text) - 2 - odd_adjustment) // 2
             # Queueing up this message now will make it the 1st thing printed.
-            box_style = DOUBLE_EDGE if use_color else ASCII
-            self._print_or_queue(Panel(text, style = 'banner', box = box_style,
-                                       padding = (0, padding)), style = 'info')
+            self._print_or_queue(_banner(name, subtitle, use_color, terminal_width),
+                                 style = 'info' if use_color else None)
 
 
     def start(self):
         '''Start the user interface.'''
         if __debug__: log('starting CLI')
-        while not self._queue.empty():
-            (text, style) = self._queue.get()
-            self._console.print(text, style = style, highlight = False)
-            sys.stdout.flush()
-        self._started = True
+        # Holding the lock makes other threads' messages wait until the queue
+        # has been drained, so they're neither lost nor printed out of order.
+        # Using the console as a context manager makes Rich buffer all the
+        # output and write it out in one go (with one flush) at the end.
+        with self._lock:
+            with self._console:
+                for (text, style) in self._queue:
+                    self._print(text, style)
+            self._queue.clear()
+            self._started = True
 
 
     def stop(self):
@@ -121,13 +126,24 @@ class CLI(UIBase):
         pass
 
 
-    def _print_or_queue(self, text, style):
-        if self._started:
-            if __debug__: log(antiformat(text))
-            self._console.print(text, style = style, highlight = False)
+    def _print(self, text, style):
+        if style is None:
+            # Unstyled text is output as-is, without markup processing.
+            self._console.out(text, highlight = False)
         else:
-            if __debug__: log(f'queueing message "{antiformat(text)}"')
-            self._queue.put((text, style))
+            self._console.print(text, style = style, highlight = False)
+
+
+    def _print_or_queue(self, text, style):
+        if not self._started:
+            with self._lock:
+                # Check again: start() may have finished while we waited.
+                if not self._started:
+                    if __debug__: logf('queueing message "{}"', text)
+                    self._queue.append((text, style))
+                    return
+        if __debug__: logf('{}', text)
+        self._print(text, style)
 
 
     def inform(self, text, *args, **kwargs):
@@ -137,20 +153,20 @@ class CLI(UIBase):
         the "quiet" flag.  However, if this method is passed the keyword
         argument "force" with a value of True, then the "quiet" setting will
         be overridden and the message printed anyway.'''
-        if ('force' in kwargs and kwargs['force']) or not self._be_quiet:
-            self._print_or_queue(text.format(*args), 'info')
-        else:
-            if __debug__: log(text, *args)
+        if self._be_quiet and not kwargs.get('force', False):
+            if __debug__: logf('suppressed message "{}" {}', text, args)
+            return
+        self._print_or_queue(_format(text, args), 'info')
 
 
     def warn(self, text, *args):
         '''Print a nonfatal, noncritical warning message.'''
-        self._print_or_queue(text.format(*args), style = 'warn')
+        self._print_or_queue(_format(text, args), style = 'warn')
 
 
     def alert(self, text, *args):
         '''Print a message reporting an error.'''
-        self._print_or_queue(text.format(*args), style = 'alert')
+        self._print_or_queue(_format(text, args), style = 'alert')
 
 
     def alert_fatal(self, text, *args, **kwargs):
@@ -162,13 +178,15 @@ class CLI(UIBase):
         version, this method does not stop the user interface (because in the
         CLI case, there is nothing equivalent to a GUI to shut down).
         '''
-        text += '\n' + kwargs['details'] if 'details' in kwargs else ''
-        self._print_or_queue(text.format(*args), style = 'fatal')
+        text = _format(text, args)
+        details = kwargs.get('details')
+        self._print_or_queue(f'{text}\n{details}' if details else text,
+                             style = 'fatal')
 
 
     def confirm(self, question):
         '''Ask a yes/no question of the user, on the command line.'''
-        return input(f'{question} (y/n) ').startswith(('y', 'Y'))
+        return input(f'{question} (y/n) ')[:1].lower() == 'y'
 
 
     def file_selection(self, operation_type, question, pattern):
@@ -185,12 +203,13 @@ class CLI(UIBase):
         responds with empty strings, the values returned are '' and not None.
         '''
         try:
-            text = (prompt + ' [default: ' + user + ']: ') if user else (prompt + ': ')
+            text = f'{prompt} [default: {user}]: ' if user else f'{prompt}: '
             input_user = input(text)
             if len(input_user) == 0:
                 input_user = user
-            hidden = ' [default: ' + '*'*len(pswd) + ']' if pswd else ''
-            text = 'Password' + (' for "' + user + '"' if user else '') + hidden + ': '
+            for_user = f' for "{user}"' if user else ''
+            hidden = f' [default: {"*"*len(pswd)}]' if pswd else ''
+            text = f'Password{for_user}{hidden}: '
             input_pswd = _password(text)
             if len(input_pswd) == 0:
                 input_pswd = pswd
@@ -204,14 +223,14 @@ class CLI(UIBase):
     def validated_input(self, message, default_value, is_valid):
         '''Get validated input from the user, optionally with a default value.'''
         while True:
-            if __debug__: log(f'asking user: "{message} [{default_value}]"')
+            if __debug__: logf('asking user: "{} [{}]"', message, default_value)
             default = (' [' + default_value + ']') if default_value else ''
             value = input(message + default + ': ')
             if default_value and value == '':
-                if __debug__: log(f'user chose default value "{default_value}"')
+                if __debug__: logf('user chose default value "{}"', default_value)
                 return default_value
             elif is_valid(value):
-                if __debug__: log(f'got "{value}" from user')
+                if __debug__: logf('got "{}" from user', value)
                 return value
             else:
                 self.alert(f'"{value}" does not appear valid for {message}')
@@ -221,11 +240,53 @@ class CLI(UIBase):
 # Miscellaneous utilities
 # .............................................................................
 
+def _console(use_color):
+    # Creating a Rich console involves probing the terminal and environment
+    # variables, so we only create one per color setting and reuse it.
+    global _CLI_THEME
+    use_color = bool(use_color)
+    if use_color not in _CONSOLES:
+        from rich.console import Console
+        from rich.theme import Theme
+        if _CLI_THEME is None:
+            _CLI_THEME = Theme(_CLI_STYLES)
+        _CONSOLES[use_color] = Console(theme = _CLI_THEME,
+                                       color_system = "auto" if use_color else None)
+    return _CONSOLES[use_color]
+
+
+def _format(text, args):
+    # Skip str.format's parsing of the text only when it can't change it.
+    # Without args, format still matters for escaped braces ("{{" & "}}").
+    return text.format(*args) if args or '{' in text or '}' in text else text
+
+
+@lru_cache(maxsize = 8)
+def _banner(name, subtitle, use_color, terminal_width):
+    # We need the plain_text version in any case, to calculate length.
+    subtitle_part = f': {subtitle}' if subtitle else ''
+    plain_text = f'Welcome to {name}{subtitle_part}'
+    if not use_color:
+        # Without color, the banner is plain ASCII and doesn't need Rich's
+        # layout engine.  The caller prints this without a style.
+        inner_width = terminal_width - 2
+        line = '+' + '-'*inner_width + '+'
+        # Truncate like Rich does, or a long title would break the box.
+        body = '|' + plain_text[:inner_width].center(inner_width) + '|'
+        return f'{line}\n{body}\n{line}'
+    from rich.box import DOUBLE_EDGE
+    from rich.panel import Panel
+    fancy_text = f'Welcome to [standout]{name}[/]{subtitle_part}'
+    odd_adjustment = 0 if (terminal_width % 2 == 0) else 2
+    padding = (terminal_width - len(plain_text) - 2 - odd_adjustment) // 2
+    return Panel(fancy_text, style = 'banner', box = DOUBLE_EDGE,
+                 padding = (0, padding))
+
+
 def _password(prompt):
     # If it's a tty, use the version that doesn't echo the password.
     if sys.stdin.isatty():
         return getpass.getpass(prompt)
     else:
-        sys.stdout.write(prompt)
-        sys.stdout.flush()
+        print(prompt, end = '', flush = True)
         return sys.stdin.readline().rstrip()
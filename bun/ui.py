@@ -18,6 +18,14 @@ from .base import UIBase
 from .cli import CLI
 
 
+# Internal variables.
+# .............................................................................
+# The singleton UI instance is kept in a module global (rather than a class
+# attribute) so that the functions below can get it with a plain lookup.
+
+_INSTANCE = None
+
+
 # Exported classes.
 # .............................................................................
 # This class is essentially a wrapper that deals with selecting the real
@@ -28,25 +36,24 @@ from .cli import CLI
 class UI(UIBase):
     '''Wrapper class for the user interface.'''
 
-    __instance = None
-
     def __new__(cls, name, subtitle = None, show_banner = True,
                 use_gui = False, use_color = True, be_quiet = False):
         '''Return an instance of the appropriate user interface handler.'''
-        if cls.__instance is None:
+        global _INSTANCE
+        if _INSTANCE is None:
             if use_gui:
                 from .gui import GUI
                 obj = GUI
             else:
                 obj = CLI
-            cls.__instance = obj(name, subtitle, show_banner,
-                                 use_gui, use_color, be_quiet)
-        return cls.__instance
+            _INSTANCE = obj(name, subtitle, show_banner,
+                            use_gui, use_color, be_quiet)
+        return _INSTANCE
 
 
     @classmethod
     def instance(cls):
-        return cls.__instance
+        return _INSTANCE
 
 
 # Exported functions.
@@ -65,7 +72,7 @@ def inform(text, *args, **kwargs):
     argument "force" with a value of True, then the "quiet" setting will
     be overridden and the message printed anyway.
     '''
-    ui = UI.instance()
+    ui = _INSTANCE
     ui.inform(text, *args, **kwargs)
 
 
@@ -75,7 +82,7 @@ def warn(text, *args):
     execution.  (For problems that prevent continued execution, use the
     alert(...) method instead.)
     '''
-    ui = UI.instance()
+    ui = _INSTANCE
     ui.warn(text, *args)
 
 
@@ -83,7 +90,7 @@ def alert(text, *args):
     '''Alert the user to an error.  This should be used in situations where
     there is a problem that will prevent normal execution.
     '''
-    ui = UI.instance()
+    ui = _INSTANCE
     ui.alert(text, *args)
 
 
@@ -97,7 +104,7 @@ def alert_fatal(text, *args, **kwargs):
     GUI to exit after the user clicks the OK button, so that the calling
     application can regain control and exit.
     '''
-    ui = UI.instance()
+    ui = _INSTANCE
     ui.alert_fatal(text, *args, **kwargs)
 
 
@@ -109,13 +116,13 @@ def file_selection(type, purpose, pattern = '*'):
     file.  The 'pattern' is a file pattern expression of the kind accepted by
     wxPython FileDialog.
     '''
-    ui = UI.instance()
+    ui = _INSTANCE
     return ui.file_selection(type, purpose, pattern)
 
 
 def validated_input(message, default_value, is_valid):
     '''Get validated input from the user, optionally with a default value.'''
-    ui = UI.instance()
+    ui = _INSTANCE
     return ui.validated_input(message, default_value, is_valid)
 
 
@@ -123,11 +130,11 @@ def login_details(prompt, user, password):
     '''Asks the user for a login name and password.  The value of 'user' and
     'password' will be used as initial values in the dialog.
     '''
-    ui = UI.instance()
+    ui = _INSTANCE
     return ui.login_details(prompt, user, password)
 
 
 def confirm(question):
     '''Returns True if the user replies 'yes' to the 'question'.'''
-    ui = UI.instance()
+    ui = _INSTANCE
     return ui.confirm(question)
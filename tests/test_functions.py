@@ -1,6 +1,8 @@
 import os
 import pytest
 import sys
+import threading
+import time
 
 try:
     thisdir = os.path.dirname(os.path.abspath(__file__))
@@ -8,7 +10,8 @@ try:
 except:
     sys.path.append('..')
 
-from bun import UI, inform, warn, alert, alert_fatal
+from bun import UI, CLI, inform, warn, alert, alert_fatal, confirm, login_details
+from bun.cli import _banner
 
 
 def test_quiet(capsys):
@@ -23,3 +26,65 @@ def test_quiet(capsys):
     alert('foo')
     out, err = capsys.readouterr()
     assert out == 'foo\n'
+
+
+def test_escaped_braces(capsys):
+    ui = UI('test', 'description of test', be_quiet = True)
+    ui.start()
+    warn('hi {{x}}')
+    out, err = capsys.readouterr()
+    assert out == 'hi {x}\n'
+
+
+def test_message_sent_during_start(capsys):
+    cli = CLI('test', None, False, False, False, False)
+    cli.inform('first')
+    thread = threading.Thread(target = cli.inform, args = ('from thread',))
+    original_print = cli._print
+    def slow_print(text, style):
+        # Send a message from another thread while the queue is being drained.
+        if text == 'first':
+            thread.start()
+            time.sleep(0.1)
+        original_print(text, style)
+    cli._print = slow_print
+    cli.start()
+    thread.join()
+    out, err = capsys.readouterr()
+    assert out == 'first\nfrom thread\n'
+
+
+def test_plain_banner():
+    banner = _banner('test', 'description', False, 40).split('\n')
+    assert banner[0] == banner[2] == '+' + '-'*38 + '+'
+    assert banner[1] == '|' + 'Welcome to test: description'.center(38) + '|'
+    banner = _banner('app', 'a subtitle here', False, 30).split('\n')
+    assert banner[0] == banner[2] == '+' + '-'*28 + '+'
+    assert banner[1] == '|Welcome to app: a subtitle h|'
+
+
+def test_confirm(monkeypatch):
+    for (reply, expected) in [('y', True), ('Yes', True), ('n', False), ('', False)]:
+        monkeypatch.setattr('builtins.input', lambda prompt: reply)
+        assert confirm('Continue?') == expected
+
+
+def test_login_details(monkeypatch):
+    prompts = []
+    def reply(prompt):
+        prompts.append(prompt)
+        return ''
+    monkeypatch.setattr('builtins.input', reply)
+    monkeypatch.setattr('bun.cli._password', reply)
+    assert login_details('Login', 'me', 'secret') == ('me', 'secret', False)
+    assert prompts == ['Login [default: me]: ',
+                       'Password for "me" [default: ******]: ']
+
+
+def test_alert_fatal_details(capsys):
+    ui = UI('test', 'description of test', be_quiet = True)
+    ui.start()
+    capsys.readouterr()
+    alert_fatal('failed on {}', 'foo', details = 'missing }')
+    out, err = capsys.readouterr()
+    assert out == 'failed on foo\nmissing }\n'